@@ -1,25 +1,32 @@
 import pandas as pd
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 from google.cloud import bigquery
 from google.auth import default
 
 # Local project modules
-from src.extract import read_google_sheet, get_data, get_data_hist
+from src.extract import read_google_sheet, read_google_sheet_tabs, get_data, get_data_hist
 from src.config import Config
 from src.transform import (
+    normalize_campaign_to_code_series,
+    normalize_campaign_to_display_series,
     normalize_country_to_currency,
-    normalize_campaign_to_code,
-    normalize_campaign_to_display,
     create_campaign_dataframes,
     create_priority_sort_key,
+    build_assignment_dict,
     assign_users_by_country,
+    prepare_for_groupby,
     count_users_per_operator,
     create_assignment_metrics,
     build_discard_from_hist,
 )
-from src.load import CreateAndLoad_BQ
+from src.load import CreateAndLoad_BQ, write_excel
+
+# Copy-on-Write: slices and renames share data until actually written to,
+# removing the defensive copies pandas 1.x made on every filter/concat.
+pd.set_option('mode.copy_on_write', True)
 
 
 def run_daily_assignment(request) -> str:
@@ -28,9 +35,11 @@ def run_daily_assignment(request) -> str:
 
 
         # ========== ASSIGNMENT CONFIGURATION ==========
-        # Read configuration file
+        # Read configuration and segment tables in one batched Sheets call
         try:
-            conf = read_google_sheet('Daily_Assignment_Configuration', 2)
+            conf, segments_tables = read_google_sheet_tabs(
+                'Daily_Assignment_Configuration', [2, 1]
+            )
         except Exception as error:
             print(f"Error reading configuration from Google Sheets: {error}")
             return f"Error: Failed to read configuration - {error}"
@@ -58,20 +67,15 @@ def run_daily_assignment(request) -> str:
         #print(f"exclude_email_mkt_users: {exclude_email_mkt_users}")
 
         # ========== DATES TO USE ==========
-        today_dt = datetime.now()
-        today_midnight = datetime(today_dt.year, today_dt.month, today_dt.day)
-        today = datetime.strftime(today_midnight, '%Y-%m-%d').replace('-', '')
-        yesterday_str = datetime.strftime(today_midnight - timedelta(days=1), '%Y-%m-%d')
+        today_date = date.today()
+        # Datetime form kept for comparisons against the datetime64 history column
+        today_midnight = datetime(today_date.year, today_date.month, today_date.day)
+        today = today_date.strftime('%Y%m%d')
+        yesterday_str = (today_date - timedelta(days=1)).isoformat()
         # days_ago_to_discard stays as int here; fetch_cutoff_str is computed after reading segments_tables
 
         # ========== DATA PREPARATION ==========
-        # Segment tables to assign (read early to build per-campaign discard windows)
-        try:
-            segments_tables = read_google_sheet('Daily_Assignment_Configuration', 1)
-        except Exception as error:
-            print(f"Error reading segment tables from Google Sheets: {error}")
-            return f"Error: Failed to read segment tables - {error}"
-
+        # Segment tables to assign (fetched with the configuration batch above)
         campaigns_to_assign = segments_tables['table_name'].tolist()
 
         # Build per-campaign discard window: fallback to global days_ago_to_discard
@@ -92,30 +96,51 @@ def run_daily_assignment(request) -> str:
                 campaign_control_map[label] = 0.0
 
         max_discard_days = max([days_ago_to_discard] + list(campaign_discard_map.values()))
-        fetch_cutoff_dt = today_midnight - timedelta(days=max_discard_days)
-        fetch_cutoff_str = datetime.strftime(fetch_cutoff_dt, '%Y-%m-%d')
+        fetch_cutoff_str = (today_date - timedelta(days=max_discard_days)).isoformat()
+        today_str = today_date.isoformat()
         print(f"History fetch window: {max_discard_days} days back ({fetch_cutoff_str})")
         print(f"Per-campaign discard windows: { {k: v for k, v in campaign_discard_map.items()} }")
 
+        # ========== CONCURRENT DATA FETCH ==========
+        # The LP sheet read and the three BigQuery extractions are independent
+        # network-bound calls; launching them together makes the wait the
+        # slowest call instead of the sum of all of them.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fut_lp = executor.submit(read_google_sheet, 'LP_TLMKT', 0)
+            fut_hist = executor.submit(
+                get_data_hist, 'tlmkt_DailyAssignment', fetch_cutoff_str, today_str, credentials=creds
+            )
+            fut_email_hist = (
+                executor.submit(
+                    get_data_hist, 'email_mkt_DailyAssignment', fetch_cutoff_str, today_str, credentials=creds
+                )
+                if exclude_email_mkt_users else None
+            )
+            fut_available = executor.submit(
+                get_data, campaigns_to_assign, currencies_to_filter, credentials=creds
+            )
+
         # LP-TLMKT processing
         try:
-            lp = read_google_sheet('LP_TLMKT', 0)
+            lp = fut_lp.result()
         except Exception as error:
             print(f"Error reading LP_TLMKT from Google Sheets: {error}")
             return f"Error: Failed to read LP_TLMKT - {error}"
         
-        lp = lp[lp['Cargo'] == 'Ejecutivo de Televentas']
-        lp = lp[lp['Estatus'] == 'Activo']
-        lp.rename(columns={'Nombre y Apellido': 'operator',
-                        'Usuario DotPanel' : 'user_dotpanel'}, inplace=True)
-
         if 'País' in lp.columns:
-            lp.rename(columns={'País': 'country'}, inplace=True)
+            country_col = 'País'
         elif 'Pais' in lp.columns:
-            lp.rename(columns={'Pais': 'country'}, inplace=True)
+            country_col = 'Pais'
         else:
             return "Error: LP_TLMKT is missing country column (País/Pais)"
 
+        # One combined mask and a projection to the two columns used downstream,
+        # instead of two sequential filters copying every sheet column twice.
+        lp = lp.loc[
+            (lp['Cargo'] == 'Ejecutivo de Televentas') & (lp['Estatus'] == 'Activo'),
+            ['Nombre y Apellido', country_col]
+        ].rename(columns={'Nombre y Apellido': 'operator', country_col: 'country'})
+
         lp['country'] = lp['country'].astype(str).str.upper().str.split(',\s*')
         original_lp_countries = (
             lp[['country']]
@@ -145,53 +170,69 @@ def run_daily_assignment(request) -> str:
 
         # Historical assignment users from telemarketing
         try:
-            daily_assigment_hist = get_data_hist('tlmkt_DailyAssignment', fetch_cutoff_str, credentials=creds)
+            daily_assigment_hist = fut_hist.result()
         except Exception as error:
             print(f"Error getting historical telemarketing data from BigQuery: {error}")
             return f"Error: Failed to get historical telemarketing data - {error}"
 
         print(f"Telemarketing historical users loaded: {daily_assigment_hist.shape[0]}")
-        daily_assigment_hist['campaign_name'] = daily_assigment_hist['campaign_name'].apply(normalize_campaign_to_code)
-        # Exclude today's assignments from discard; keep yesterday and older.
-        daily_assigment_hist = daily_assigment_hist[daily_assigment_hist['assignment_date'] < today_midnight]
+        daily_assigment_hist['campaign_name'] = normalize_campaign_to_code_series(
+            daily_assigment_hist['campaign_name']
+        )
 
-        # Build users_to_discard per campaign using each campaign's specific lookback window
+        # Build users_to_discard per campaign using each campaign's specific lookback
+        # window. Parts are collected in a list and concatenated exactly once so the
+        # accumulated rows are never recopied.
         try:
-            users_to_discard = build_discard_from_hist(
+            discard_parts = [build_discard_from_hist(
                 daily_assigment_hist, campaign_discard_map, today_midnight, days_ago_to_discard
-            )
+            )]
         except Exception as error:
             print(f"Error building discard list from telemarketing history: {error}")
             return f"Error: Failed to build discard list - {error}"
 
         if exclude_email_mkt_users:
             try:
-                email_mkt_hist = get_data_hist('email_mkt_DailyAssignment', fetch_cutoff_str, credentials=creds)
+                email_mkt_hist = fut_email_hist.result()
                 print(f"Email marketing historical users loaded: {email_mkt_hist.shape[0]}")
                 if not email_mkt_hist.empty:
-                    email_mkt_hist['campaign_name'] = email_mkt_hist['campaign_name'].apply(normalize_campaign_to_code)
-                    # Exclude today's assignments from discard; keep yesterday and older.
-                    email_mkt_hist = email_mkt_hist[email_mkt_hist['assignment_date'] < today_midnight]
-                    email_users_to_discard = build_discard_from_hist(
-                        email_mkt_hist, campaign_discard_map, today_midnight, days_ago_to_discard
+                    email_mkt_hist['campaign_name'] = normalize_campaign_to_code_series(
+                        email_mkt_hist['campaign_name']
                     )
-                    users_to_discard = pd.concat([users_to_discard, email_users_to_discard], ignore_index=True).drop_duplicates()
+                    discard_parts.append(build_discard_from_hist(
+                        email_mkt_hist, campaign_discard_map, today_midnight, days_ago_to_discard
+                    ))
             except Exception as error:
                 print(f"Warning: Could not load email marketing history, continuing with TLMKT only: {error}")
         else:
             print("Skipping email marketing historical load (exclude_email_mkt_users=False)")
 
+        if len(discard_parts) > 1:
+            users_to_discard = pd.concat(discard_parts, ignore_index=True).drop_duplicates()
+        else:
+            users_to_discard = discard_parts[0]
+
         print(f"Total users to discard: {users_to_discard.shape[0]}")
 
-        # Data extraction to assign
+        # Data extraction to assign (fetched concurrently above)
         print("Extracting data to assign...")
         try:
-            available_users = get_data(campaigns_to_assign, currencies_to_filter, credentials=creds)
+            available_users = fut_available.result()
         except Exception as error:
             print(f"Error extracting data from BigQuery: {error}")
             return f"Error: Failed to extract data - {error}"
         print("Data extracted successfully")
 
+        # Shrink the hot columns up front: the currency code repeats heavily so it
+        # becomes a categorical, and the free-text columns move to Arrow-backed
+        # strings (roughly half the memory of object dtype, faster comparisons).
+        available_users = available_users.astype({
+            'register_currency': 'category',
+            'username': 'string[pyarrow]',
+            'firstLast_name': 'string[pyarrow]',
+            'phone': 'string[pyarrow]',
+        })
+
 
 
         if campaigns_to_filter:
@@ -215,14 +256,34 @@ def run_daily_assignment(request) -> str:
 
         # Remove users contacted within each campaign's lookback window
         print(f"Discarding previously contacted users (per-campaign windows, up to {yesterday_str})")
-        available_users = available_users.merge(
-            users_to_discard, 
-            on=['user_id', 'campaign_name'], 
-            how='left', 
-            indicator=True
+
+        # Align the anti-join key dtypes first: shared (sorted) categories let the
+        # join hash small integer codes instead of Python strings, and user_id on
+        # both sides must use the same integer dtype.
+        shared_categories = pd.api.types.union_categoricals([
+            available_users['campaign_name'].astype('category'),
+            users_to_discard['campaign_name'].astype('category'),
+        ]).categories.sort_values()
+        available_users['campaign_name'] = pd.Categorical(
+            available_users['campaign_name'], categories=shared_categories
+        )
+        users_to_discard['campaign_name'] = pd.Categorical(
+            users_to_discard['campaign_name'], categories=shared_categories
+        )
+        users_to_discard['user_id'] = users_to_discard['user_id'].astype(
+            available_users['user_id'].dtype
         )
 
-        available_users = available_users[available_users['_merge'] == 'left_only'].drop(columns=['_merge'])
+        # Set-style anti-join on a MultiIndex: avoids materializing the merged
+        # frame (and its _merge indicator column) just to drop the matches.
+        # users_to_discard is already deduplicated by build_discard_from_hist.
+        discard_idx = pd.MultiIndex.from_frame(
+            users_to_discard[['user_id', 'campaign_name']]
+        )
+        keep_mask = ~pd.MultiIndex.from_frame(
+            available_users[['user_id', 'campaign_name']]
+        ).isin(discard_idx)
+        available_users = available_users.loc[keep_mask]
 
         print(f"Available users for assignment: {available_users.shape[0]}")
 
@@ -250,19 +311,22 @@ def run_daily_assignment(request) -> str:
 
         # Summary of available users by currency (after discarding contacted users)
         print("\nAvailable users by currency (after discarding contacted users):")
+        # value_counts on a categorical also lists empty categories; keep only the
+        # currencies actually present so the summary matches the previous output
         currency_summary = available_users['register_currency'].value_counts()
+        currency_summary = currency_summary[currency_summary > 0]
         for currency, count in currency_summary.items():
             print(f"  \u2022 {currency}: {count} users")
         
         # Show users by campaign after filtering
         if not available_users.empty:
             print("\nUsers available per campaign after filtering contacted users:")
-            users_per_campaign = available_users.groupby('campaign_name').size().sort_values(ascending=False)
+            users_per_campaign = available_users.groupby('campaign_name', observed=True).size().sort_values(ascending=False)
             for campaign, count in users_per_campaign.items():
                 print(f"  • {campaign} Campaign: {count} users")
                 # Show currency distribution per campaign
                 campaign_currencies = available_users[available_users['campaign_name'] == campaign]['register_currency'].value_counts()
-                currency_info = ", ".join([f"{curr}: {cnt}" for curr, cnt in campaign_currencies.items()])
+                currency_info = ", ".join([f"{curr}: {cnt}" for curr, cnt in campaign_currencies.items() if cnt > 0])
                 print(f"    Currency Distribution: {currency_info}")
 
             # Operators assignment visibility by country
@@ -280,7 +344,7 @@ def run_daily_assignment(request) -> str:
             print("\nAvailable users by campaign and priority:")
             available_priority = (
                 available_users
-                .groupby(['campaign_name', 'priority'], dropna=False)
+                .groupby(['campaign_name', 'priority'], dropna=False, observed=True)
                 .size()
                 .reset_index(name='users')
             )
@@ -298,48 +362,9 @@ def run_daily_assignment(request) -> str:
         campaign_dfs = create_campaign_dataframes(available_users)
 
         # ========== USER ASSIGNMENT ==========
-        # Create assignment dictionary
+        # Create assignment dictionary (vectorized explode + quota-split lookup)
         print("\nCreating assignment dictionary...")
-        assignment_dict = {}
-
-        # Define percentages according to number of assigned countries per operator
-        percentages = {
-            1: [1.0],
-            2: [0.7, 0.3],
-            3: [0.5, 0.3, 0.2]
-        }
-
-        # Iterate over operators in LP and build quotas by country
-        for _, row in lp.iterrows():
-            operator = row['operator']
-            countries = row['country']
-
-            if not isinstance(countries, list):
-                countries = [countries]
-
-            countries = [str(country).strip().upper() for country in countries if str(country).strip()]
-            num_countries = len(countries)
-
-            if num_countries == 0:
-                continue
-
-            if num_countries in percentages:
-                country_percentages = percentages[num_countries]
-            else:
-                # Fallback: split equally when operator has more than 3 countries
-                country_percentages = [1 / num_countries] * num_countries
-
-            for idx, country in enumerate(countries):
-                users_to_assign = round(users_to_assign_per_operator * country_percentages[idx])
-
-                if country not in assignment_dict:
-                    assignment_dict[country] = []
-
-                assignment_dict[country].append({
-                    'operator': operator,
-                    'users_to_assign': users_to_assign
-                })
-
+        assignment_dict = build_assignment_dict(lp, users_to_assign_per_operator)
         print("Assignment Dictionary created successfully.")
 
 
@@ -362,11 +387,16 @@ def run_daily_assignment(request) -> str:
         print(f"Users assigned: {len(assigned_users)}")
         print(f"Users remaining unassigned: {len(remaining_users)}")
 
+        # Operator and campaign were written as plain strings during the
+        # assignment; every groupby below keys on them, so switch to category
+        # codes once here (register_currency was converted at ingestion)
+        assigned_users = prepare_for_groupby(assigned_users)
+
         if not assigned_users.empty:
             print("\nAssigned users by campaign and priority:")
             assigned_priority = (
                 assigned_users
-                .groupby(['campaign', 'priority'], dropna=False)
+                .groupby(['campaign', 'priority'], dropna=False, observed=True)
                 .size()
                 .reset_index(name='users')
             )
@@ -386,7 +416,7 @@ def run_daily_assignment(request) -> str:
         # Show summary by campaign
         if not assigned_users.empty:
             print(f"\n   Assignment by campaign:")
-            campaign_summary = assigned_users.groupby('campaign').agg({
+            campaign_summary = assigned_users.groupby('campaign', observed=True).agg({
                 'user_id': 'count',
                 'operator': 'nunique'
             }).rename(columns={'user_id': 'users', 'operator': 'operators'})
@@ -437,28 +467,30 @@ def run_daily_assignment(request) -> str:
         # Save assignment metrics locally
         print("\nSaving assignment metrics to local file...")
         try:
-            assignment_metrics.to_excel(f'./data/Assignment_Metrics_{today}.xlsx', index=False)
+            write_excel(assignment_metrics, f'./data/Assignment_Metrics_{today}.xlsx')
             print("Assignment metrics saved to local file.")
         except Exception as error:
             print(f"Error saving metrics to local file: {error}")
             # Continue even if local save fails
         
         # ========== DATA LOADING ==========
-        assigned_users = assigned_users.copy()
+        # assign_users_by_country returns a freshly built frame, so the
+        # transformations below can mutate it directly without a defensive copy.
 
         # Convert internal codes to Spanish names for BigQuery
-        assigned_users['campaign_name'] = assigned_users['campaign_name'].apply(normalize_campaign_to_display)
+        assigned_users['campaign_name'] = normalize_campaign_to_display_series(
+            assigned_users['campaign_name']
+        )
 
         # Ensure campaign_details column exists (NULL for regular campaigns, filled for external campaigns)
         if 'campaign_details' not in assigned_users.columns:
             assigned_users['campaign_details'] = None
 
-        # Apply data type transformations
-        assigned_users['assignment_date'] = pd.to_datetime(assigned_users['assignment_date'])
-        assigned_users['user_id'] = assigned_users['user_id'].astype('Int64')
-        assigned_users['level'] = assigned_users['level'].astype('Int64')
-        assigned_users['phone'] = assigned_users['phone'].astype(str)
-        assigned_users['last_activity'] = pd.to_datetime(assigned_users['last_activity'])
+        # Apply data type transformations: one astype pass for the scalar casts,
+        # and cached datetime parsing (dates repeat heavily within a single run)
+        assigned_users = assigned_users.astype({'user_id': 'Int64', 'level': 'Int64', 'phone': str})
+        for date_col in ('assignment_date', 'last_activity'):
+            assigned_users[date_col] = pd.to_datetime(assigned_users[date_col], cache=True)
 
         # Sort for operator consumption: operator first, then highest priority to lowest.
         assigned_users['_priority_key'] = assigned_users['priority'].apply(create_priority_sort_key)
@@ -486,12 +518,14 @@ def run_daily_assignment(request) -> str:
             'last_activity'
         ]
 
-        assigned_users = assigned_users[column_order]
+        # Single reselect drops the helper columns and fixes the column order;
+        # the same frame is reused for the Excel export and the BigQuery load.
+        assigned_users = assigned_users.loc[:, column_order]
 
         # Save assignment locally
         print("Saving assignment to local file...")
         try:
-            assigned_users.to_excel(f'./data/Telemarketing_Assignment_{today}.xlsx', index=False)
+            write_excel(assigned_users, f'./data/Telemarketing_Assignment_{today}.xlsx')
             print("Assignment saved to local file.")
         except Exception as error:
             print(f"Error saving to local file: {error}")
@@ -503,9 +537,7 @@ def run_daily_assignment(request) -> str:
 
         # Create Assignment data dictionary
         dict_tlmkt_assignment = {
-            'DailyAssignment': assigned_users[['assignment_date', 'operator', 'campaign_name', 'user_id',
-            'username', 'firstLast_name', 'phone', 'level', 'register_currency', 'last_activity',
-            'campaign_details', 'priority']],
+            'DailyAssignment': assigned_users,
             'AssignmentMetrics': assignment_metrics[['assignment_date', 'campaign', 'available_users',
             'assigned_users', 'unassigned_users', 'country', 'priority']]
         }
@@ -14,6 +14,34 @@ def _parse_bool(value):
 
     raise ValueError(f"Cannot parse bool value: {value}")
 
+
+def _parse_str_list(value):
+    """Parse a comma-separated string into a list of stripped items."""
+    if value is None or str(value).strip() == '':
+        return []
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+def _parse_str_list_dict(var_name, value):
+    """Parse entries like 'PEN:sport_events,reactivation|BOB:sport_events' into a dict."""
+    parsed_dict = {}
+    if value is not None and str(value).strip():
+        for entry in str(value).split('|'):
+            entry = entry.strip()
+            if not entry:
+                continue
+            if ':' not in entry:
+                raise ValueError(
+                    f"Invalid dict entry '{entry}' for variable '{var_name}'. "
+                    "Expected format: 'KEY:val1,val2'"
+                )
+            key, _, values_str = entry.partition(':')
+            key = key.strip()
+            values = [v.strip() for v in values_str.split(',') if v.strip()]
+            parsed_dict[key] = values
+    return parsed_dict
+
+
 class Config:
     """Manages configuration parameters from DataFrame."""
     
@@ -21,49 +49,39 @@ class Config:
         """Initialize from DataFrame with columns: variable, value, type."""
         self._load_from_dataframe(conf_df)
     
+    _KNOWN_TYPES = ('int', 'float', 'str', 'list(str)', 'dict(str,list(str))', 'bool')
+
     def _load_from_dataframe(self, conf_df):
-        """Load and convert configuration values by type."""
-        for _, row in conf_df.iterrows():
-            var_name = row['variable']
-            var_value = row['value']
-            var_type = row['type']
-            
-            # Convert value according to specified type
+        """Load and convert configuration values, one vectorized pass per type."""
+        unknown_types = set(conf_df['type']) - set(self._KNOWN_TYPES)
+        if unknown_types:
+            raise ValueError(f"Unknown type: {sorted(unknown_types)[0]}")
+
+        for var_type, group in conf_df.groupby('type', sort=False):
+            names = group['variable'].tolist()
+            values = group['value']
+
+            # Scalar types convert in one C-level cast; composite types parse per value
             if var_type == 'int':
-                setattr(self, var_name, int(var_value))
+                converted = values.astype(int).tolist()
             elif var_type == 'float':
-                setattr(self, var_name, float(var_value))
+                converted = values.astype(float).tolist()
             elif var_type == 'str':
-                setattr(self, var_name, str(var_value))
+                converted = values.astype(str).tolist()
             elif var_type == 'list(str)':
-                if var_value is None or str(var_value).strip() == '':
-                    parsed_list = []
-                else:
-                    parsed_list = [item.strip() for item in str(var_value).split(',') if item.strip()]
-                setattr(self, var_name, parsed_list)
+                converted = [_parse_str_list(value) for value in values]
             elif var_type == 'dict(str,list(str))':
                 # Format: "PEN:sport_events,reactivation|BOB:sport_events"
                 # Empty value -> empty dict
-                parsed_dict = {}
-                if var_value is not None and str(var_value).strip():
-                    for entry in str(var_value).split('|'):
-                        entry = entry.strip()
-                        if not entry:
-                            continue
-                        if ':' not in entry:
-                            raise ValueError(
-                                f"Invalid dict entry '{entry}' for variable '{var_name}'. "
-                                "Expected format: 'KEY:val1,val2'"
-                            )
-                        key, _, values_str = entry.partition(':')
-                        key = key.strip()
-                        values = [v.strip() for v in values_str.split(',') if v.strip()]
-                        parsed_dict[key] = values
-                setattr(self, var_name, parsed_dict)
-            elif var_type == 'bool':
-                setattr(self, var_name, _parse_bool(var_value))
+                converted = [
+                    _parse_str_list_dict(name, value)
+                    for name, value in zip(names, values)
+                ]
             else:
-                raise ValueError(f"Unknown type: {var_type}")
+                converted = [_parse_bool(value) for value in values]
+
+            for name, value in zip(names, converted):
+                setattr(self, name, value)
     
     def __repr__(self):
         """Show config for debugging."""
@@ -1,28 +1,47 @@
+import json
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 from google.api_core.exceptions import GoogleAPIError
 
-# Function to check if a string is a valid JSON
+# Function to check if a string is a valid (non-scalar) JSON document
 def is_valid_json(json_str):
-    import json
-    try:
+    if not isinstance(json_str, str):
         json_str = str(json_str)
+    # Quick reject: JSON documents start with '{' or '[' (ignoring leading
+    # whitespace), which also rules out bare numbers and plain strings
+    # without ever reaching the parser
+    if json_str.lstrip()[:1] not in ('{', '['):
+        return False
+    try:
         json.loads(json_str)
-        try:
-            int(json_str)
-            return False
-        except:
-            try:
-                float(json_str)
-                return False
-            except ValueError:
-                return True
+        return True
     except ValueError:
         return False
 
+def write_excel(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a DataFrame to an xlsx file using xlsxwriter in constant_memory mode.
+
+    constant_memory streams rows to disk as they are written instead of
+    building the whole workbook in memory the way the default openpyxl
+    writer does, which matters for the larger daily assignment exports.
+
+    Args:
+        df (pd.DataFrame): DataFrame to export.
+        path (str): Destination .xlsx path.
+    """
+    with pd.ExcelWriter(
+        path,
+        engine='xlsxwriter',
+        engine_kwargs={'options': {'constant_memory': True}},
+    ) as writer:
+        df.to_excel(writer, index=False)
+
+
 def CreateAndLoad_BQ(data_dict: Dict[str, pd.DataFrame], bq: bigquery.Client, 
                     project_id: str, dataset_id: str, prefix: str = None, deleted_if_exist: bool = False, 
                     load_data: bool = False, delete_today: bool = False, date_column: str = 'assignment_date') -> None:
@@ -61,62 +80,65 @@ def CreateAndLoad_BQ(data_dict: Dict[str, pd.DataFrame], bq: bigquery.Client,
     'datetime64[us]' : 'DATETIME'
     }
 
-    for label, data in data_dict.items():
+    # One list_tables call replaces the up-to-three get_table round trips per
+    # label; workers consult (and maintain) this shared membership set.
+    try:
+        existing_tables = {t.table_id for t in bq.list_tables(f'{project_id}.{dataset_id}')}
+    except NotFound:
+        existing_tables = set()
+
+    # Batch the per-table MAX(date) probes into one UNION ALL round trip.
+    # If the batch fails (typically because a table does not exist yet), the
+    # dict stays partial/empty and workers fall back to their own probe.
+    max_dates = {}
+    if load_data and not deleted_if_exist and len(data_dict) > 1:
+        probes = []
+        for label in data_dict:
+            table_name = prefix + label if prefix else label
+            probes.append(
+                f"SELECT '{label}' AS label, MAX({date_column}) AS max_date "
+                f"FROM `{project_id}.{dataset_id}.{table_name}`"
+            )
         try:
-            # Ensure data is a DataFrame
-            if not isinstance(data, pd.DataFrame):
-                raise TypeError(f"The data for label '{label}' is not a pandas DataFrame.")
-
-            # Infer data types
-            data_dict_type = dict(zip(data.columns, data.dtypes.astype(str)))
-
-            # Generate Schema to create table in BigQuery
-            data_schema = []
-            for key, value in data_dict_type.items():
-                try:
-                    if value == 'object':
-                        if data[key].apply(lambda x: is_valid_json(x)).all():
-                            field_type = 'STRING'
-                        else:
-                            field_type = type_data_to_bq.get(value, 'STRING')  # Default to STRING for unsupported types
-                    else:
-                        field_type = type_data_to_bq.get(value, 'STRING')
-                except KeyError:
-                    raise KeyError(f"Data type '{value}' for column '{key}' is not supported.")
+            for row in bq.query("\nUNION ALL\n".join(probes)).result():
+                max_dates[row.label] = row.max_date
+        except Exception:
+            pass
 
-                data_schema.append(bigquery.SchemaField(key, field_type, mode='NULLABLE'))
+    def process_table(label: str, data: pd.DataFrame) -> None:
+        # Ensure data is a DataFrame
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError(f"The data for label '{label}' is not a pandas DataFrame.")
 
-            # Build the table_id
-            table_name = prefix + label if prefix else label
-            table_id = f'{project_id}.{dataset_id}.{table_name}'
+        # Build the table_id
+        table_name = prefix + label if prefix else label
+        table_id = f'{project_id}.{dataset_id}.{table_name}'
 
+        try:
             # Check if deleted_if_exist is True, if so, delete the table
-            if deleted_if_exist:
-                try:
-                    bq.get_table(table_id)  # Check if the table exists
-                    bq.delete_table(table_id)  # Delete the table
-                    print(f"\nTable: {table_id} Deleted.")
-                except NotFound:
-                    pass  # Ignore if the table doesn't exist
+            if deleted_if_exist and table_name in existing_tables:
+                bq.delete_table(table_id)  # Delete the table
+                existing_tables.discard(table_name)
+                print(f"\nTable: {table_id} Deleted.")
 
             # Now check if the table exists
-            try:
-                bq.get_table(table_id)  # Try to get the table info
-                table = bq.get_table(table_id)  # Get table details using the same client
-                
+            if table_name in existing_tables:
                 # Only check dates and print load messages if we're actually loading data
                 if load_data:
                     print(f"Table {table_id} already exists. Checking max date before loading data.")
                     
                     if not deleted_if_exist:
-                        # Query to get the maximum date from the table
-                        query = f"""
-                            SELECT MAX({date_column}) AS max_date
-                            FROM `{table_id}`
-                        """
-                        query_job = bq.query(query)
-                        result = query_job.result()
-                        max_date = next(result).max_date  # Get the maximum date
+                        if label in max_dates:
+                            max_date = max_dates[label]  # From the batched probe
+                        else:
+                            # Query to get the maximum date from the table
+                            query = f"""
+                                SELECT MAX({date_column}) AS max_date
+                                FROM `{table_id}`
+                            """
+                            query_job = bq.query(query)
+                            result = query_job.result()
+                            max_date = next(result).max_date  # Get the maximum date
 
                         # Compare with today's date
                         today = pd.to_datetime(datetime.today().date())
@@ -150,23 +172,36 @@ def CreateAndLoad_BQ(data_dict: Dict[str, pd.DataFrame], bq: bigquery.Client,
                         else:
                             if max_date == today:
                                 print(f"Table {table_id} has data for today. No new data will be appended.")
-                                continue  # Skip to the next table if max date is today
+                                return  # Skip this table if max date is today
                             else:
                                 print(f"Max date is {max_date}. New data will be appended.")
                 else:
                     print(f"Table {table_id} already exists. Data loading is disabled (load_data=False).")
 
-            except NotFound:
+            else:
                 print(f"\nTable: {table_id} does not exist. Creating new table.")
+                # Schema inference is only needed here, on first-time creation;
+                # appends below take their column types from the parquet payload.
+                # Iterating dtypes directly skips the intermediate astype(str)
+                # Series the old zip-into-dict construction allocated.
+                data_schema = [
+                    bigquery.SchemaField(column, type_data_to_bq.get(str(dtype), 'STRING'), mode='NULLABLE')
+                    for column, dtype in data.dtypes.items()
+                ]
                 # Create the table if it does not exist
                 table = bigquery.Table(table_id, schema=data_schema)
                 table = bq.create_table(table)
+                existing_tables.add(table_name)
                 print(f"Created table {table.project}.{table.dataset_id}.{table.table_id}")
 
             if load_data:
-                # Set job configuration
+                # Set job configuration. PARQUET makes the client serialize the
+                # DataFrame through pyarrow into columnar blocks, which BigQuery
+                # ingests as a bulk load job instead of row-by-row streaming.
+                # No explicit schema: appends match the destination table's
+                # columns by name using the types carried in the parquet payload.
                 job_config = bigquery.LoadJobConfig(
-                    schema            = data_schema,
+                    source_format     = bigquery.SourceFormat.PARQUET,
                     write_disposition = 'WRITE_APPEND'  # Ensure data is appended to the table
                 )
 
@@ -180,13 +215,28 @@ def CreateAndLoad_BQ(data_dict: Dict[str, pd.DataFrame], bq: bigquery.Client,
                 print(f"\t- Loaded table... {table_id}")
                 print(f"\t- {table.num_rows} rows, {len(table.schema)} columns")
 
+        except GoogleAPIError as e:
+            print(f"GoogleAPIError while creating table '{table_id}': {e}")
+            raise  # Re-raise the exception to notify the calling code
+
+    # Each table is independent network-bound work (existence checks, max-date
+    # probe, load job), so process them concurrently and gather the results.
+    with ThreadPoolExecutor(max_workers=min(len(data_dict), 16) or 1) as executor:
+        futures = {
+            label: executor.submit(process_table, label, data)
+            for label, data in data_dict.items()
+        }
+
+    for label, future in futures.items():
+        try:
+            future.result()
+
         except (TypeError, KeyError) as e:
             print(f"Error processing label '{label}': {e}")
             continue  # Proceed to the next item
 
-        except GoogleAPIError as e:
-            print(f"GoogleAPIError while creating table '{table_id}': {e}")
-            raise  # Re-raise the exception to notify the calling code
+        except GoogleAPIError:
+            raise  # Already reported with its table_id; notify the calling code
 
         except Exception as e:
             print(f"An unexpected error occurred for label '{label}': {e}")
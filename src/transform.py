@@ -1,7 +1,6 @@
 import pandas as pd
 import numpy as np
-import re
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from typing import List, Dict
 
@@ -47,28 +46,35 @@ def normalize_country_to_currency(value: str) -> str:
     return _COUNTRY_TO_CURRENCY.get(text, text)
 
 
+# Spanish display name ↔ internal code lookups. Bulk call sites should use
+# Series.map on these dicts directly (single C-level pass) instead of
+# Series.apply over the scalar normalizers below.
+CAMPAIGN_CODE_MAP = {
+    'No Depositantes': 'non_depositors',
+    'Reactivación': 'reactivation',
+    'Segundo Depósito': 'second_deposit',
+    'Tercer Depósito': 'third_deposit',
+    'Rejected': 'rejected',
+}
+
+CAMPAIGN_DISPLAY_MAP = {code: display for display, code in CAMPAIGN_CODE_MAP.items()}
+
+
 def normalize_campaign_to_code(campaign_str):
     """
     Converts Spanish campaign names to internal codes.
     Used when processing input data.
-    
+
     Args:
         campaign_str (str): Campaign name in Spanish
-        
+
     Returns:
         str: Internal campaign code
     """
-    # Patterns to convert Spanish → code
-    pattern_map = {
-        r'No Depositantes': 'non_depositors',
-        r'Reactivación': 'reactivation',
-        r'Segundo Depósito': 'second_deposit',
-        r'Tercer Depósito': 'third_deposit',
-        r'Rejected': 'rejected'
-    }
-    
-    for pat, val in pattern_map.items():
-        campaign_str = re.sub(pat, val, campaign_str)
+    # The labels are literal strings, so plain str.replace does the job
+    # without dispatching through the regex engine on every call
+    for pat, val in CAMPAIGN_CODE_MAP.items():
+        campaign_str = campaign_str.replace(pat, val)
     return campaign_str
 
 
@@ -76,23 +82,41 @@ def normalize_campaign_to_display(campaign_str):
     """
     Converts internal codes to Spanish campaign names.
     Used before sending data to BigQuery or for display.
-    
+
     Args:
         campaign_str (str): Internal campaign code
-        
+
     Returns:
         str: Campaign name in Spanish
     """
-    # Mapping to convert code → Spanish
-    code_to_display = {
-        'non_depositors': 'No Depositantes',
-        'reactivation': 'Reactivación',
-        'second_deposit': 'Segundo Depósito',
-        'third_deposit': 'Tercer Depósito',
-        'rejected': 'Rejected'
-    }
-    
-    return code_to_display.get(campaign_str, campaign_str)
+    return CAMPAIGN_DISPLAY_MAP.get(campaign_str, campaign_str)
+
+
+def normalize_campaign_to_code_series(campaign_series):
+    """
+    Vectorized form of normalize_campaign_to_code for whole columns:
+    one C-level hash lookup per row, with unknown labels passed through.
+
+    Args:
+        campaign_series (pd.Series): Campaign names in Spanish.
+
+    Returns:
+        pd.Series: Internal campaign codes.
+    """
+    return campaign_series.map(CAMPAIGN_CODE_MAP).fillna(campaign_series)
+
+
+def normalize_campaign_to_display_series(campaign_series):
+    """
+    Vectorized form of normalize_campaign_to_display for whole columns.
+
+    Args:
+        campaign_series (pd.Series): Internal campaign codes.
+
+    Returns:
+        pd.Series: Campaign names in Spanish.
+    """
+    return campaign_series.map(CAMPAIGN_DISPLAY_MAP).fillna(campaign_series)
 
 
 def create_priority_sort_key(priority_value):
@@ -179,6 +203,29 @@ def sort_by_priority(df):
     return df_sorted
 
 
+def prepare_for_groupby(df):
+    """
+    Converts the repeated-label key columns to category dtype so downstream
+    groupbys hash small integer codes instead of Python strings.
+
+    Only string-typed columns are touched (object dtype on pandas 2.x, str
+    dtype on 3.x); columns that are already categorical pass through.
+
+    Args:
+        df (pd.DataFrame): DataFrame to prepare.
+
+    Returns:
+        pd.DataFrame: Same DataFrame with key columns as category dtype.
+    """
+    for col in ['register_currency', 'operator', 'campaign', 'campaign_name']:
+        if col not in df.columns:
+            continue
+        dtype = df[col].dtype
+        if dtype == object or pd.api.types.is_string_dtype(dtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
 def analyze_user_distribution_by_currency(df):
     """
     Analyzes the DataFrame by the 'register_currency' column, counting users per currency and calculating
@@ -192,7 +239,7 @@ def analyze_user_distribution_by_currency(df):
       of users per currency.
     """
     # Group by 'register_currency' and count users
-    df_group = df.groupby('register_currency')['user_id'].count().reset_index()
+    df_group = df.groupby('register_currency', observed=True)['user_id'].count().reset_index()
     
     # Calculate the percentage of users per currency
     df_group['percentage'] = (df_group['user_id'] / df_group['user_id'].sum() * 100).round(1)
@@ -200,6 +247,37 @@ def analyze_user_distribution_by_currency(df):
     return df_group
 
 
+def _count_pairs(df, left, right, value_name):
+    """
+    Counts rows per (left, right) key pair without the groupby machinery:
+    both key columns are factorized once, fused into a single integer code
+    and counted with np.unique. Null keys are dropped and the output is
+    sorted by (left, right), matching the groupby it replaces.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame.
+        left (str): First key column name.
+        right (str): Second key column name.
+        value_name (str): Name for the resulting count column.
+
+    Returns:
+        pd.DataFrame: Columns [left, right, value_name].
+    """
+    left_codes, left_labels = pd.factorize(df[left], sort=True)
+    right_codes, right_labels = pd.factorize(df[right], sort=True)
+    n_right = len(right_labels) or 1
+
+    valid = (left_codes >= 0) & (right_codes >= 0)
+    fused = left_codes[valid].astype(np.int64) * n_right + right_codes[valid]
+    codes, counts = np.unique(fused, return_counts=True)
+
+    return pd.DataFrame({
+        left: left_labels.take(codes // n_right),
+        right: right_labels.take(codes % n_right),
+        value_name: counts,
+    })
+
+
 def count_users_per_operator(df):
     """
     Counts the number of 'username' records per operator.
@@ -210,11 +288,18 @@ def count_users_per_operator(df):
     Returns:
     - DataFrame with the count of 'username' records per operator.
     """
-    users_by_operator = df.groupby(['operator'])['username'].count().reset_index()
+    # value_counts skips the groupby apparatus; sort_index restores the
+    # by-operator ordering the old groupby emitted
+    users_by_operator = (
+        df['operator'].value_counts(sort=False)
+        .sort_index()
+        .rename_axis('operator')
+        .reset_index(name='username')
+    )
     return users_by_operator
 
 
-def count_users_by_campaign_and_operator(df): 
+def count_users_by_campaign_and_operator(df):
     """
     Counts the number of 'username' records by campaign and operator.
 
@@ -224,8 +309,7 @@ def count_users_by_campaign_and_operator(df):
     Returns:
     - DataFrame with the count of 'username' records per campaign and operator.
     """
-    users_by_campaing_n_operator = df.groupby(['campaign_name', 'operator'])['username'].count().reset_index()
-    return users_by_campaing_n_operator
+    return _count_pairs(df, 'campaign_name', 'operator', 'username')
 
 
 def analyze_operator_currency_distribution(df):
@@ -238,9 +322,8 @@ def analyze_operator_currency_distribution(df):
     Returns:
     - DataFrame with the count of 'username' records per operator and currency, sorted by operator.
     """
-    users_by_ope_currency = df.groupby(['operator', 'register_currency'])['username'].count().reset_index()
-    users_by_ope_currency = users_by_ope_currency.sort_values(by=['operator']).reset_index(drop=True)
-    return users_by_ope_currency
+    # _count_pairs output is already sorted by (operator, currency)
+    return _count_pairs(df, 'operator', 'register_currency', 'username')
 
 
 def check_duplicates(df):
@@ -253,13 +336,21 @@ def check_duplicates(df):
     Returns:
     - DataFrame with the duplicates found.
     """
-    # Check for duplicates by 'user_id'
-    duplicates = df[df.duplicated(subset=['user_id'], keep=False)]
-    
-    # Show the duplicates found, sorted by 'user_id'
-    duplicates = duplicates.sort_values('user_id')
-    
-    return duplicates
+    if len(df) < 2:
+        return df.iloc[0:0]
+
+    # Sort once and compare neighbours: a row is a duplicate iff it equals
+    # the previous or next user_id in sorted order. One NumPy comparison per
+    # direction replaces the hash-based duplicated() pass, and the gather
+    # through the stable sort order returns the result already sorted by
+    # user_id (original order preserved within ties).
+    user_ids = df['user_id'].to_numpy()
+    order = np.argsort(user_ids, kind='stable')
+    sorted_ids = user_ids[order]
+    equals_next = sorted_ids[:-1] == sorted_ids[1:]
+    duplicate_mask = np.r_[False, equals_next] | np.r_[equals_next, False]
+
+    return df.iloc[order[duplicate_mask]]
 
 
 def get_operator_campaign_summary(df):
@@ -277,23 +368,30 @@ def get_operator_campaign_summary(df):
         * username_count: Number of users assigned per campaign.
         * currency_distribution: Dictionary showing currency distribution per campaign.
     """
-    # Group by operator and campaign, counting the number of users
-    grouped = df.groupby(['operator', 'campaign', 'register_currency']).size().reset_index(name='username_count')
-
-    # Create a dictionary of currency distribution by operator and campaign
-    currency_distribution = (
-        grouped.groupby(['operator', 'campaign'])
-        .apply(lambda x: x.set_index('register_currency')['username_count'].to_dict())
-        .reset_index(name='currency_distribution')
-    )
-
-    # Combine results with total users by operator and campaign
-    result = (
-        grouped.groupby(['operator', 'campaign'])['username_count']
-        .sum()
-        .reset_index()
-        .merge(currency_distribution, on=['operator', 'campaign'], how='left')
-    )
+    # Group by operator, campaign and currency, counting the number of users
+    grouped = df.groupby(['operator', 'campaign', 'register_currency'], observed=True).size()
+
+    if grouped.empty:
+        return pd.DataFrame(columns=['operator', 'campaign', 'username_count', 'currency_distribution'])
+
+    # Build the per-(operator, campaign) currency dicts in one ordered pass
+    # over the aggregated counts. A second groupby.apply would leave pandas'
+    # C fast path and re-index a sub-frame per group, plus a merge to glue
+    # the totals back on; the counts Series is tiny after aggregation, so a
+    # plain loop over it is both simpler and faster.
+    currency_distribution = defaultdict(dict)
+    for (operator, campaign, currency), count in grouped.items():
+        currency_distribution[(operator, campaign)][currency] = count
+
+    result = pd.DataFrame([
+        {
+            'operator': operator,
+            'campaign': campaign,
+            'username_count': sum(distribution.values()),
+            'currency_distribution': distribution,
+        }
+        for (operator, campaign), distribution in currency_distribution.items()
+    ])
 
     # Sort results by operator and campaign
     result = result.sort_values(by=['operator', 'campaign']).reset_index(drop=True)
@@ -314,8 +412,7 @@ def count_users_by_campaign_and_currency(df):
             - 'register_currency': Currency.
             - 'user_count': Number of users per campaign and currency.
     """
-    grouped = df.groupby(['campaign', 'register_currency']).size().reset_index(name='user_count')
-    return grouped
+    return _count_pairs(df, 'campaign', 'register_currency', 'user_count')
 
 
 def count_operators_per_campaign(df):
@@ -330,7 +427,7 @@ def count_operators_per_campaign(df):
         * 'campaign': Campaign name.
         * 'unique_operators': Number of unique operators per campaign.
     """
-    result = df.groupby('campaign')['operator'].nunique().reset_index()
+    result = df.groupby('campaign', observed=True)['operator'].nunique().reset_index()
     result.rename(columns={'operator': 'unique_operators'}, inplace=True)
     return result
 
@@ -351,26 +448,99 @@ def create_campaign_dataframes(available_users):
     Returns:
         dict: Dictionary with {campaign_name: DataFrame sorted by priority}
     """
-    np.random.seed(42)  # Ensure repeatability
-    
+    # Seeded generator instead of np.random.seed: same repeatability without
+    # mutating NumPy's global RNG state for unrelated code
+    rng = np.random.default_rng(42)
+
     campaign_dfs = {}
-    unique_campaigns = available_users['campaign_name'].unique()
-    
-    for campaign in unique_campaigns:
-        campaign_df = available_users[available_users['campaign_name'] == campaign].copy()
-        
+
+    # One groupby split replaces a full-column equality scan (plus copy) per
+    # campaign; sort=False keeps the campaigns in first-appearance order,
+    # matching the unique() walk this used to do
+    for campaign, campaign_df in available_users.groupby('campaign_name', sort=False, observed=True):
         # First randomize to break ties within same priority
-        campaign_df = campaign_df.sample(frac=1, random_state=42).reset_index(drop=True)
-        
+        campaign_df = campaign_df.iloc[rng.permutation(len(campaign_df))].reset_index(drop=True)
+
         # Then sort by campaign priority (ULTRA-1, ULTRA-2, ALTA-1, etc.)
         # This ensures ALL ULTRA-1 users (across all currencies) come before ULTRA-2
-        campaign_df = sort_by_priority(campaign_df)
-        
-        campaign_dfs[campaign] = campaign_df
-    
+        campaign_dfs[campaign] = sort_by_priority(campaign_df)
+
     return campaign_dfs
 
 
+# Percentage split of an operator's quota according to how many countries
+# the operator covers. Order follows the country order in LP_TLMKT.
+_QUOTA_SPLIT = pd.DataFrame(
+    [(1, 0, 1.0), (2, 0, 0.7), (2, 1, 0.3), (3, 0, 0.5), (3, 1, 0.3), (3, 2, 0.2)],
+    columns=['num_countries', 'country_idx', 'pct'],
+)
+
+
+def build_assignment_frame(lp, users_to_assign_per_operator):
+    """
+    Builds the per-country assignment quotas from the LP operators DataFrame
+    as a flat (country, operator, users_to_assign) DataFrame — one int column
+    instead of nested per-pair dicts, so downstream arithmetic on quotas can
+    stay vectorized.
+
+    Each operator's quota is split across their countries using _QUOTA_SPLIT
+    (100% for 1 country, 70/30 for 2, 50/30/20 for 3). Operators covering more
+    than 3 countries fall back to an equal split.
+
+    Args:
+        lp (pd.DataFrame): Operators DataFrame with columns 'operator' and
+            'country', where 'country' holds a list of normalized country codes.
+        users_to_assign_per_operator (int): Total users each operator should receive.
+
+    Returns:
+        pd.DataFrame: Columns ['country', 'operator', 'users_to_assign'], one
+            row per operator-country pair, in LP country order per operator.
+    """
+    operators = lp[['operator', 'country']].copy()
+    operators['country'] = operators['country'].apply(
+        lambda countries: [
+            str(country).strip().upper()
+            for country in (countries if isinstance(countries, list) else [countries])
+            if str(country).strip()
+        ]
+    )
+    operators['num_countries'] = operators['country'].str.len()
+    operators = operators[operators['num_countries'] > 0]
+
+    exploded = operators.explode('country')
+    # cumcount over the original row index keeps the split per operator row
+    exploded['country_idx'] = exploded.groupby(level=0).cumcount()
+    exploded = exploded.merge(_QUOTA_SPLIT, on=['num_countries', 'country_idx'], how='left')
+
+    # Fallback: split equally when an operator has more than 3 countries
+    exploded['pct'] = exploded['pct'].fillna(1 / exploded['num_countries'])
+    exploded['users_to_assign'] = (
+        (users_to_assign_per_operator * exploded['pct']).round().astype(int)
+    )
+
+    return exploded[['country', 'operator', 'users_to_assign']].reset_index(drop=True)
+
+
+def build_assignment_dict(lp, users_to_assign_per_operator):
+    """
+    Thin adapter over build_assignment_frame for callers that consume the
+    per-country dict-of-records shape (assign_users_by_country).
+
+    Args:
+        lp (pd.DataFrame): Operators DataFrame with columns 'operator' and
+            'country', where 'country' holds a list of normalized country codes.
+        users_to_assign_per_operator (int): Total users each operator should receive.
+
+    Returns:
+        dict: {country: [{'operator': str, 'users_to_assign': int}, ...], ...}
+    """
+    quotas = build_assignment_frame(lp, users_to_assign_per_operator)
+    return {
+        country: sub[['operator', 'users_to_assign']].to_dict('records')
+        for country, sub in quotas.groupby('country', sort=False)
+    }
+
+
 def build_discard_from_hist(
     hist_df: pd.DataFrame,
     campaign_discard_map: Dict[str, int],
@@ -445,74 +615,90 @@ def assign_users_by_country(available_users, assignment_dict, extra_users_countr
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (assigned_users_df, remaining_users_df)
     """
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
 
-    assigned_users_list = []
     if extra_users_country is None:
         extra_users_country = []
 
     # Global randomized pool to break ties, then sorted by priority.
     # We will always pick first match to preserve priority inside each country filter.
-    available_pool = available_users.sample(frac=1, random_state=42).reset_index(drop=True)
+    available_pool = available_users.iloc[rng.permutation(len(available_users))].reset_index(drop=True)
     available_pool = sort_by_priority(available_pool)
 
+    # Index the pool by currency once: each queue holds the pool row labels for
+    # that currency in priority order, so picking the next candidate is a O(1)
+    # popleft instead of a full boolean scan of the pool per assigned user.
+    pool_queues = {
+        currency: deque(idx)
+        for currency, idx in available_pool.groupby('register_currency', observed=True).groups.items()
+    }
+
+    assigned_positions = []
+    assigned_operators = []
+
     for country, operators_info in assignment_dict.items():
         if not operators_info:
             continue
 
-        operator_assignments = {op_info['operator']: 0 for op_info in operators_info}
+        # Positional caps and counts: the round-robin cursor already is an
+        # integer, so tracking quota by position skips the two string-hash
+        # lookups the old operator-name-keyed dict paid per candidate
+        caps = [op_info['users_to_assign'] for op_info in operators_info]
+        counts = [0] * len(operators_info)
         operator_index = 0
 
+        # Operators only ever transition below-cap -> at-cap, so a running
+        # tally replaces the all(...) scan over every operator that the old
+        # exit condition ran each time the cursor wrapped around
+        full_count = sum(1 for cap in caps if cap <= 0)
+
         while True:
-            current_op_info = operators_info[operator_index]
-            operator = current_op_info['operator']
-            users_to_assign = current_op_info['users_to_assign']
+            operator = operators_info[operator_index]['operator']
 
-            remaining_limit = users_to_assign - operator_assignments[operator]
-            if remaining_limit <= 0:
-                operator_index = (operator_index + 1) % len(operators_info)
-                if operator_index == 0 and all(
-                    operator_assignments[op_info['operator']] >= op_info['users_to_assign']
-                    for op_info in operators_info
-                ):
+            if counts[operator_index] >= caps[operator_index]:
+                if full_count == len(operators_info):
                     break
+                operator_index = (operator_index + 1) % len(operators_info)
                 continue
 
             # 1) Try target country first
-            target_mask = available_pool['register_currency'] == country
-            if target_mask.any():
-                candidate_idx = available_pool[target_mask].index[0]
+            target_queue = pool_queues.get(country)
+            if target_queue:
+                candidate_idx = target_queue.popleft()
             else:
                 # 2) Fallback countries in configured priority order
                 candidate_idx = None
                 for fallback_country in extra_users_country:
-                    fallback_mask = available_pool['register_currency'] == fallback_country
-                    if fallback_mask.any():
-                        candidate_idx = available_pool[fallback_mask].index[0]
+                    fallback_queue = pool_queues.get(fallback_country)
+                    if fallback_queue:
+                        candidate_idx = fallback_queue.popleft()
                         break
 
                 if candidate_idx is None:
                     # No candidates left for this target-country quota
                     break
 
-            assigned = available_pool.loc[[candidate_idx]].copy()
-            assigned['campaign'] = assigned['campaign_name']
-            assigned['operator'] = operator
-            assigned_users_list.append(assigned)
+            assigned_positions.append(candidate_idx)
+            assigned_operators.append(operator)
 
-            operator_assignments[operator] += 1
-            available_pool = available_pool.drop(index=candidate_idx)
+            counts[operator_index] += 1
+            if counts[operator_index] >= caps[operator_index]:
+                full_count += 1
             operator_index = (operator_index + 1) % len(operators_info)
 
-    if assigned_users_list:
-        assigned_users_df = pd.concat(assigned_users_list, ignore_index=True)
+    if assigned_positions:
+        assigned_users_df = available_pool.loc[assigned_positions].copy()
+        assigned_users_df['campaign'] = assigned_users_df['campaign_name']
+        assigned_users_df['operator'] = assigned_operators
+        assigned_users_df = assigned_users_df.reset_index(drop=True)
     else:
         assigned_users_df = available_users.head(0).copy()
         assigned_users_df['campaign'] = pd.Series(dtype='object')
         assigned_users_df['operator'] = pd.Series(dtype='object')
 
-    remaining_users_df = available_pool.copy()
+    remaining_users_df = available_pool.drop(index=assigned_positions)
     if not remaining_users_df.empty:
+        remaining_users_df = remaining_users_df.copy()
         remaining_users_df['campaign'] = remaining_users_df['campaign_name']
 
     return assigned_users_df, remaining_users_df
@@ -541,43 +727,56 @@ def calculate_remaining_assignments_dict(assigned_users_df, assignment_dict):
                 ...
             }
     """
-    # Create a DataFrame from assignment_dict
-    assignment_list = []
+    # One aggregation gives the per-(campaign, operator) counts; walking
+    # assignment_dict against it directly skips the intermediate DataFrame,
+    # merge and per-row rebuild this used to go through
+    if assigned_users_df.empty:
+        assigned_counts = {}
+    else:
+        assigned_counts = (
+            assigned_users_df.groupby(['campaign', 'operator'], observed=True)
+            .size()
+            .to_dict()
+        )
+
+    remaining = defaultdict(list)
     for campaign, operators_info in assignment_dict.items():
         for operator_info in operators_info:
-            assignment_list.append({
-                'campaign': campaign,
-                'operator': operator_info['operator'],
-                'users_to_assign': operator_info['users_to_assign']
-            })
-    assignment_df = pd.DataFrame(assignment_list)
-
-    # Count assigned users by campaign and operator
-    assigned_counts = (
-        assigned_users_df.groupby(['campaign', 'operator'])
-        .size()
-        .reset_index(name='users_assigned')
-    )
+            operator = operator_info['operator']
+            users_remaining = operator_info['users_to_assign'] - assigned_counts.get((campaign, operator), 0)
+            if users_remaining > 0:
+                remaining[campaign].append({'operator': operator, 'users_to_assign': int(users_remaining)})
 
-    # Combine the assignments DataFrame with assigned users counts
-    result_df = assignment_df.merge(assigned_counts, on=['campaign', 'operator'], how='left')
+    return dict(remaining)
 
-    # Fill NaN in 'users_assigned' with 0 (for operators without assigned users yet)
-    result_df['users_assigned'] = result_df['users_assigned'].fillna(0).astype(int)
 
-    # Calculate remaining users to assign
-    result_df['users_remaining'] = result_df['users_to_assign'] - result_df['users_assigned']
+def _round_robin_operator_sequence(caps, n_rows):
+    """
+    Closed-form round-robin deal: returns the operator index that receives
+    each of the first min(n_rows, sum(caps)) users when users are handed out
+    one at a time to operators in order, skipping operators at capacity.
 
-    # Create the dictionary with the requested structure
-    remnant_assignment_dict = defaultdict(list)
-    for _, row in result_df.iterrows():
-        if row['users_remaining'] > 0:  # Only include operators with remaining users
-            remnant_assignment_dict[row['campaign']].append({
-                'operator': row['operator'],
-                'users_to_assign': row['users_remaining']
-            })
+    Args:
+        caps (list[int]): Per-operator capacities, in operator order.
+        n_rows (int): Number of users available to deal out.
 
-    return dict(remnant_assignment_dict)
+    Returns:
+        np.ndarray: Operator indices, one per assigned user, in deal order.
+    """
+    caps = np.clip(np.asarray(caps, dtype=np.int64), 0, None)
+    total = int(caps.sum())
+    n_assign = min(n_rows, total)
+    if n_assign == 0:
+        return np.empty(0, dtype=np.int32)
+
+    # Each operator appears caps[j] times, tagged with the round number of
+    # each occurrence; a stable sort by (round, operator) is the deal order.
+    # int32 is plenty for daily quota totals and halves the bandwidth the
+    # lexsort touches.
+    op_ids = np.repeat(np.arange(len(caps), dtype=np.int32), caps)
+    rounds = np.arange(total, dtype=np.int32) - np.repeat((caps.cumsum() - caps).astype(np.int32), caps)
+    order = np.lexsort((op_ids, rounds))
+    return op_ids[order][:n_assign]
 
 
 def assign_currencies(assignment_dict, currency_list, campaign_dfs, max_percent=None, split_percentage=False):
@@ -596,9 +795,6 @@ def assign_currencies(assignment_dict, currency_list, campaign_dfs, max_percent=
         pd.DataFrame: DataFrame with assignments made.
         pd.DataFrame: DataFrame with remaining unassigned users.
     """
-    # Seed to ensure repeatability
-    np.random.seed(42)
-    
     assigned_users_list = []
     remaining_users_list = []
 
@@ -619,181 +815,59 @@ def assign_currencies(assignment_dict, currency_list, campaign_dfs, max_percent=
             print(f"No operators for campaign {campaign}. Skipping...")
             continue
 
-        # If no percentage limit, assign without restrictions (relevant_currencies case)
+        # Row labels and operators handed out by this campaign's deal(s); the
+        # assigned frame is materialized once per campaign from these, and
+        # the remaining-user computation drops exactly these labels instead
+        # of rescanning every assigned frame for matching user_ids
+        assigned_labels = []
+        assigned_operators = []
+
+        def deal(users, caps):
+            # One closed-form deal instead of slicing a row off the frame per
+            # user: users keep their priority order, operators their quotas.
+            operator_seq = _round_robin_operator_sequence(caps, len(users))
+            if len(operator_seq):
+                assigned_labels.extend(users.index[:len(operator_seq)])
+                assigned_operators.extend(operators_info[i]['operator'] for i in operator_seq)
+
+        # The three modes only differ in how the per-operator caps are scaled
+        # and whether the deal runs per currency or over the combined slice
         if max_percent is None:
-            # Create a dictionary to track how many users each operator has received
-            operator_assignments = {op_info['operator']: 0 for op_info in operators_info}
-            operator_index = 0  # Index to assign users circularly among operators
-
-            while not currency_users.empty:
-                # Get current operator
-                current_op_info = operators_info[operator_index]
-                operator = current_op_info['operator']
-                users_to_assign = current_op_info['users_to_assign']
-
-                # Check how many users this operator already has assigned
-                already_assigned = operator_assignments[operator]
-
-                # Calculate how many more users this operator can receive
-                remaining_limit = users_to_assign - already_assigned
-
-                if remaining_limit <= 0:
-                    # This operator has reached its limit, move to next
-                    operator_index = (operator_index + 1) % len(operators_info)
-                    
-                    # If we've completed a full cycle and no operator can receive more users, exit
-                    if operator_index == 0 and all(
-                        operator_assignments[op_info['operator']] >= op_info['users_to_assign']
-                        for op_info in operators_info
-                    ):
-                        break
-                    continue
-
-                # Always assign one by one for equitable distribution
-                num_users_to_assign = 1
-
-                # Assign users
-                assigned = currency_users.iloc[:num_users_to_assign].copy()
-                assigned['campaign'] = campaign
-                assigned['operator'] = operator
-                assigned_users_list.append(assigned)
-
-                # Update assignment counter
-                operator_assignments[operator] += num_users_to_assign
-
-                # Remove assigned users
-                currency_users = currency_users.iloc[num_users_to_assign:]
-
-                # Advance to next operator circularly
-                operator_index = (operator_index + 1) % len(operators_info)
+            # No percentage limit (relevant_currencies case)
+            caps = [op_info['users_to_assign'] for op_info in operators_info]
+            deal(currency_users, caps)
+
+        elif split_percentage:
+            # Split percentage among currencies (priority_currencies, big_currencies behavior)
+            num_currencies = len(currency_list)
+            max_percent_per_currency = max_percent / num_currencies if num_currencies > 0 else 0
+
+            # Per-operator cap for each currency; the deals are independent
+            # per currency so each one is a separate closed-form pass
+            caps = [
+                int(op_info['users_to_assign'] * max_percent_per_currency)
+                for op_info in operators_info
+            ]
+            for currency in currency_list:
+                deal(currency_users[currency_users['register_currency'] == currency], caps)
 
         else:
-            # Assignment with percentage limits
-            if split_percentage:
-                # Split percentage among currencies (priority_currencies, big_currencies behavior)
-                num_currencies = len(currency_list)
-                max_percent_per_currency = max_percent / num_currencies if num_currencies > 0 else 0
-
-                # Create a dictionary to track how many users of each currency each operator has received
-                operator_assignments = {op_info['operator']: {currency: 0 for currency in currency_list} for op_info in operators_info}
-
-                # Assign users by currency
-                for currency in currency_list:
-                    currency_specific_users = currency_users[currency_users['register_currency'] == currency].copy()
-                    operator_index = 0  # Index to assign users circularly among operators
-
-                    while not currency_specific_users.empty:
-                        # Get current operator
-                        current_op_info = operators_info[operator_index]
-                        operator = current_op_info['operator']
-                        users_to_assign = current_op_info['users_to_assign']
-
-                        # Calculate user limit for this currency and operator
-                        max_users_per_currency = int(users_to_assign * max_percent_per_currency)
-
-                        # Check how many users of this currency this operator already has assigned
-                        already_assigned = operator_assignments[operator][currency]
-                        
-                        # Calculate how many more users this operator can receive for this currency
-                        remaining_limit = max_users_per_currency - already_assigned
-
-                        if remaining_limit <= 0:
-                            # This operator has reached its limit for this currency, move to next
-                            operator_index = (operator_index + 1) % len(operators_info)
-                            
-                            # If we've completed a full cycle and no operator can receive more users, exit
-                            if operator_index == 0 and all(
-                                operator_assignments[op_info['operator']][currency] >= int(op_info['users_to_assign'] * max_percent_per_currency)
-                                for op_info in operators_info
-                            ):
-                                break
-                            continue
-
-                        # Determine how many users to assign
-                        if len(currency_specific_users) < len(operators_info):
-                            # If there are fewer users than operators, assign one to each operator until exhausted
-                            num_users_to_assign = 1
-                        else:
-                            # Assign up to limit or one user at a time for equitable distribution
-                            num_users_to_assign = min(len(currency_specific_users), remaining_limit, 1)
-
-                        # Assign users
-                        assigned = currency_specific_users.iloc[:num_users_to_assign].copy()
-                        assigned['campaign'] = campaign
-                        assigned['operator'] = operator
-                        assigned_users_list.append(assigned)
-
-                        # Update assignment counter
-                        operator_assignments[operator][currency] += num_users_to_assign
-
-                        # Remove assigned users
-                        currency_specific_users = currency_specific_users.iloc[num_users_to_assign:]
-
-                        # Advance to next operator circularly
-                        operator_index = (operator_index + 1) % len(operators_info)
+            # Use total percentage for all currencies combined (small_currencies behavior)
+            caps = [int(op_info['users_to_assign'] * max_percent) for op_info in operators_info]
+            deal(currency_users, caps)
+
+        # Single gather for everything this campaign dealt (the split mode
+        # used to append one frame per currency and leave them for the final
+        # concat to stitch together)
+        if assigned_labels:
+            assigned = currency_users.loc[assigned_labels]
+            assigned['campaign'] = campaign
+            assigned['operator'] = assigned_operators
+            assigned_users_list.append(assigned)
+
+        # Save remaining users: the currency slice minus the rows just dealt
+        remaining_currency_users = currency_users.drop(index=assigned_labels)
 
-            else:
-                # Use total percentage for all currencies combined (small_currencies behavior)
-                # Create a dictionary to track how many users each operator has received
-                operator_assignments = {op_info['operator']: 0 for op_info in operators_info}
-                operator_index = 0  # Index to assign users circularly among operators
-
-                while not currency_users.empty:
-                    # Get current operator
-                    current_op_info = operators_info[operator_index]
-                    operator = current_op_info['operator']
-                    users_to_assign = current_op_info['users_to_assign']
-
-                    # Calculate total user limit for this operator
-                    max_users_total = int(users_to_assign * max_percent)
-
-                    # Check how many users this operator already has assigned
-                    already_assigned = operator_assignments[operator]
-
-                    # Calculate how many more users this operator can receive
-                    remaining_limit = max_users_total - already_assigned
-
-                    if remaining_limit <= 0:
-                        # This operator has reached its limit, move to next
-                        operator_index = (operator_index + 1) % len(operators_info)
-                        
-                        # If we've completed a full cycle and no operator can receive more users, exit
-                        if operator_index == 0 and all(
-                            operator_assignments[op_info['operator']] >= int(op_info['users_to_assign'] * max_percent)
-                            for op_info in operators_info
-                        ):
-                            break
-                        continue
-
-                    # Always assign one by one for equitable distribution
-                    num_users_to_assign = 1
-
-                    # Assign users
-                    assigned = currency_users.iloc[:num_users_to_assign].copy()
-                    assigned['campaign'] = campaign
-                    assigned['operator'] = operator
-                    assigned_users_list.append(assigned)
-
-                    # Update assignment counter
-                    operator_assignments[operator] += num_users_to_assign
-
-                    # Remove assigned users
-                    currency_users = currency_users.iloc[num_users_to_assign:]
-
-                    # Advance to next operator circularly
-                    operator_index = (operator_index + 1) % len(operators_info)
-
-        # Save remaining users
-        remaining_currency_users = campaign_df[campaign_df['register_currency'].isin(currency_list)]
-        
-        # Remove users that were already assigned
-        assigned_user_ids = []
-        for assigned_df in assigned_users_list:
-            if not assigned_df.empty and assigned_df['campaign'].iloc[0] == campaign:
-                assigned_user_ids.extend(assigned_df['user_id'].tolist())
-        
-        remaining_currency_users = remaining_currency_users[~remaining_currency_users['user_id'].isin(assigned_user_ids)]
-        
         if not remaining_currency_users.empty:
             remaining_currency_users = remaining_currency_users.copy()
             remaining_currency_users['campaign'] = campaign
@@ -826,127 +900,90 @@ def complete_assignments(remaining_users_df, remaining_assignments_dict, extra_u
         pd.DataFrame: DataFrame with assignments made.
         pd.DataFrame: DataFrame with remaining unassigned users.
     """
-    # Seed to ensure repeatability
-    np.random.seed(42)
-    
-    assigned_users_list = []
-    # Keep a copy of available users that gets updated after each assignment
-    available_users = remaining_users_df.copy()
-    
+    # Nothing left to hand out — assign_currencies returns a column-less
+    # empty frame in that case, so bail out before touching columns
+    if remaining_users_df.empty:
+        return pd.DataFrame(), remaining_users_df
+
     # Sort by campaign priority without re-randomizing
     # (users were already randomized when campaign_dfs were created)
     # This ensures ULTRA-1 users are assigned before ULTRA-2, etc.
-    available_users = sort_by_priority(available_users)
+    # The frame is never sliced or copied after this point: campaigns consume
+    # rows by flipping an alive mask, and the assignments are gathered from
+    # the original frame in a single iloc at the end.
+    available_users = sort_by_priority(remaining_users_df.copy())
+
+    alive = np.ones(len(available_users), dtype=bool)
+    campaign_values = available_users['campaign'].to_numpy()
+
+    # Only the same-campaign test varies between loop iterations; the extra
+    # campaign membership and the currency tier (priority=2, relevant=1,
+    # other=0) are fixed, so hash them against the full column exactly once
+    extra_mask = available_users['campaign'].isin(set(extra_users_campaign)).to_numpy()
+    currency_tier = np.where(
+        available_users['register_currency'].isin(set(priority_currencies)), 2,
+        np.where(available_users['register_currency'].isin(set(relevant_currencies)), 1, 0)
+    )
+
+    assigned_positions = []
+    assigned_campaigns = []
+    assigned_operators = []
 
     for campaign, operators_info in remaining_assignments_dict.items():
         if len(operators_info) == 0:
             print(f"No operators for campaign {campaign}. Skipping...")
             continue
 
-        # Create a dictionary to track how many users each operator has received
-        operator_assignments = {op_info['operator']: 0 for op_info in operators_info}
-
-        # Assign users by operator circularly
-        operator_index = 0  # Index to assign users circularly among operators
-
-        while not available_users.empty:
-            # Get current operator
-            current_op_info = operators_info[operator_index]
-            operator = current_op_info['operator']
-            users_to_assign = current_op_info['users_to_assign']
-
-            # Check how many users this operator already has assigned
-            already_assigned = operator_assignments[operator]
-
-            # Calculate how many more users this operator can receive
-            remaining_limit = users_to_assign - already_assigned
-
-            if remaining_limit <= 0:
-                # This operator has reached its limit, move to next
-                operator_index = (operator_index + 1) % len(operators_info)
-                
-                # If we've completed a full cycle and no operator can receive more users, exit
-                if operator_index == 0 and all(
-                    operator_assignments[op_info['operator']] >= op_info['users_to_assign']
-                    for op_info in operators_info
-                ):
-                    break
-                continue
-
-            # Search for available users in priority order
-            user_to_assign = None
-            
-            # 1. Prioritize users from same campaign with priority currencies
-            campaign_priority_users = available_users[
-                (available_users['campaign'] == campaign) & 
-                (available_users['register_currency'].isin(priority_currencies))
-            ]
-            if not campaign_priority_users.empty:
-                user_to_assign = campaign_priority_users.iloc[0]
-            
-            # 2. Users from same campaign with relevant currencies
-            elif not campaign_priority_users.empty or True:  # Always check this condition
-                campaign_relevant_users = available_users[
-                    (available_users['campaign'] == campaign) & 
-                    (available_users['register_currency'].isin(relevant_currencies))
-                ]
-                if not campaign_relevant_users.empty:
-                    user_to_assign = campaign_relevant_users.iloc[0]
-            
-            # 3. Any user from same campaign
-            if user_to_assign is None:
-                campaign_users = available_users[available_users['campaign'] == campaign]
-                if not campaign_users.empty:
-                    user_to_assign = campaign_users.iloc[0]
-            
-            # 4. Users from extra campaigns with priority currencies
-            if user_to_assign is None:
-                extra_priority_users = available_users[
-                    (available_users['campaign'].isin(extra_users_campaign)) & 
-                    (available_users['register_currency'].isin(priority_currencies))
-                ]
-                if not extra_priority_users.empty:
-                    user_to_assign = extra_priority_users.iloc[0]
-            
-            # 5. Users from extra campaigns with relevant currencies
-            if user_to_assign is None:
-                extra_relevant_users = available_users[
-                    (available_users['campaign'].isin(extra_users_campaign)) & 
-                    (available_users['register_currency'].isin(relevant_currencies))
-                ]
-                if not extra_relevant_users.empty:
-                    user_to_assign = extra_relevant_users.iloc[0]
-            
-            # 6. Any user from extra campaigns
-            if user_to_assign is None:
-                extra_users_df = available_users[available_users['campaign'].isin(extra_users_campaign)]
-                if not extra_users_df.empty:
-                    user_to_assign = extra_users_df.iloc[0]
-            
-            # If no users available, exit the loop
-            if user_to_assign is None:
-                break
-
-            # Create assignment record
-            assigned = user_to_assign.to_frame().T.copy()
-            assigned['campaign'] = campaign
-            assigned['operator'] = operator
-            assigned_users_list.append(assigned)
-
-            # Update assignment counter
-            operator_assignments[operator] += 1
+        if not alive.any():
+            break
+
+        # A candidate's priority relative to this campaign never changes while
+        # the campaign is being filled, so instead of rebuilding up to six
+        # boolean masks per assignment, score every row once and consume from
+        # the head of a single stable sort. The composite score reproduces the
+        # old search order exactly:
+        #   same campaign + priority currency (32) > same + relevant (31) >
+        #   same, any currency (30) > extra + priority (12) > extra +
+        #   relevant (11) > extra, any currency (10).
+        # Eligibility is gated on the campaign part alone: rows from neither
+        # this campaign nor an extra campaign are never assignable, whatever
+        # their currency tier. Rows consumed by earlier campaigns are zeroed.
+        campaign_part = np.where(campaign_values == campaign, 3, np.where(extra_mask, 1, 0))
+        score = campaign_part * 10 + currency_tier
+        score[~alive] = 0
+
+        # Stable descending sort keeps the existing available_users order as
+        # the tie-breaker, matching the old iloc[0] pick within each tier.
+        # Every eligible row scores >= 10 and every ineligible one <= 2, so
+        # the eligible rows are exactly the head of the sorted order.
+        order = np.argsort(-score, kind='stable')
+        eligible = order[:np.count_nonzero((campaign_part > 0) & alive)]
+        if len(eligible) == 0:
+            continue
 
-            # Remove assigned user from available users DataFrame
-            user_id_to_remove = user_to_assign['user_id']
-            available_users = available_users[available_users['user_id'] != user_id_to_remove]
+        # Same circular deal as assign_currencies: operators receive users in
+        # rounds until each hits its users_to_assign cap or candidates run out
+        caps = [op_info['users_to_assign'] for op_info in operators_info]
+        operator_seq = _round_robin_operator_sequence(caps, len(eligible))
+        if len(operator_seq) == 0:
+            continue
 
-            # Advance to next operator circularly
-            operator_index = (operator_index + 1) % len(operators_info)
+        consumed = eligible[:len(operator_seq)]
+        alive[consumed] = False
+        assigned_positions.extend(consumed.tolist())
+        assigned_campaigns.extend([campaign] * len(consumed))
+        assigned_operators.extend(operators_info[i]['operator'] for i in operator_seq)
+
+    # Single gather for every campaign's assignments instead of a concat over
+    # per-campaign frames
+    if assigned_positions:
+        assigned_users_df = available_users.iloc[assigned_positions].reset_index(drop=True)
+        assigned_users_df['campaign'] = assigned_campaigns
+        assigned_users_df['operator'] = assigned_operators
+    else:
+        assigned_users_df = pd.DataFrame()
 
-    # Combine all assignments
-    assigned_users_df = pd.concat(assigned_users_list, ignore_index=True) if assigned_users_list else pd.DataFrame()
-    
-    return assigned_users_df, available_users
+    return assigned_users_df, available_users[alive]
 
 
 def create_assignment_metrics(available_users, assigned_users, assignment_date):
@@ -974,7 +1011,7 @@ def create_assignment_metrics(available_users, assigned_users, assignment_date):
     # Available users by country and campaign
     available_metrics = (
         available_users
-        .groupby(['priority', 'register_currency', 'campaign_name'], dropna=False)
+        .groupby(['priority', 'register_currency', 'campaign_name'], dropna=False, observed=True)
         .size()
         .reset_index(name='available_users')
     )
@@ -982,7 +1019,7 @@ def create_assignment_metrics(available_users, assigned_users, assignment_date):
     # Assigned users by country and campaign
     assigned_metrics = (
         assigned_users
-        .groupby(['priority', 'register_currency', 'campaign_name'], dropna=False)
+        .groupby(['priority', 'register_currency', 'campaign_name'], dropna=False, observed=True)
         .size()
         .reset_index(name='assigned_users')
     )